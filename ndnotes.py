@@ -5,11 +5,13 @@ import shlex
 import subprocess
 import textwrap
 import time
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+from itertools import islice
 from pathlib import Path
 
 import yaml
 from dateutil import parser
+from dateutil.rrule import rrulestr
 from prompt_toolkit import prompt
 from prompt_toolkit.keys import Keys
 from rich.console import Console
@@ -24,6 +26,32 @@ NERDNOTES_DIR = Path.home() / ".nerdnotes"
 NOTES_DIR = NERDNOTES_DIR / "notes"
 TODOS_DIR = NERDNOTES_DIR / "todos"
 
+WEEKDAYS = {
+    "monday": "MO",
+    "tuesday": "TU",
+    "wednesday": "WE",
+    "thursday": "TH",
+    "friday": "FR",
+    "saturday": "SA",
+    "sunday": "SU",
+}
+RECURRENCE_KEYWORDS = {
+    "daily": "FREQ=DAILY",
+    "every day": "FREQ=DAILY",
+    "weekly": "FREQ=WEEKLY",
+    "every week": "FREQ=WEEKLY",
+    "monthly": "FREQ=MONTHLY",
+    "every month": "FREQ=MONTHLY",
+    "yearly": "FREQ=YEARLY",
+    "annually": "FREQ=YEARLY",
+    "every year": "FREQ=YEARLY",
+}
+RRULE_PATTERN = r"\brrule:(\S+)"
+# Keywords only count at the very end, so "Write weekly report" stays a
+# one-off todo while "Write report weekly" recurs.
+KEYWORD_PATTERN = rf"\s+({'|'.join(RECURRENCE_KEYWORDS)}|every ({'|'.join(WEEKDAYS)}))$"
+UNTIL_UTC_PATTERN = r"UNTIL=(\d{8}T\d{6})Z"
+
 notes = []
 todos = []
 selected_row = 0
@@ -92,7 +120,21 @@ def refresh_todos():
     todos_file = TODOS_DIR / "todos.txt"
     if todos_file.exists():
         with todos_file.open("r") as f:
-            todos = [line.strip().split("|") for line in f.readlines()]
+            todos = [parse_todo(line) for line in f.readlines()]
+
+
+# Parse a todo line; the recurrence rule field is optional
+def parse_todo(line):
+    parts = line.strip().split("|")
+    return tuple(parts + [""] * (6 - len(parts)))
+
+
+# Format a todo line, only writing the rule field for recurring todos
+def format_todo(todo_id, description, status, created, due_date, rule=None):
+    line = f"{todo_id}|{description}|{status}|{created}|{due_date or ''}"
+    if rule:
+        line += f"|{rule}"
+    return f"{line}\n"
 
 
 def create_key_bindings():
@@ -157,14 +199,117 @@ def extract_due_date(description):
         return None
 
 
+# Extract recurrence rule from todo description, returns the rule and the
+# description with the recurrence text removed
+def extract_recurrence(description):
+    match = re.search(RRULE_PATTERN, description, re.IGNORECASE)
+    if match:
+        rule = match.group(1).upper()
+        description = description[: match.start()] + description[match.end() :]
+        return rule, " ".join(description.split())
+
+    match = re.search(KEYWORD_PATTERN, description, re.IGNORECASE)
+    if match:
+        keyword = match.group(1).lower()
+        if match.group(2):
+            rule = f"FREQ=WEEKLY;BYDAY={WEEKDAYS[match.group(2).lower()]}"
+        else:
+            rule = RECURRENCE_KEYWORDS[keyword]
+        return rule, description[: match.start()].strip()
+
+    return None, description
+
+
+# Build a dateutil rule, raising ValueError for anything unusable. dateutil
+# refuses a UTC UNTIL with a naive DTSTART, so that is converted to naive
+# local time first.
+def build_rule(rule, start):
+    def to_local(match):
+        until = datetime.strptime(match.group(1), "%Y%m%dT%H%M%S")
+        until = until.replace(tzinfo=timezone.utc).astimezone().replace(tzinfo=None)
+        return f"UNTIL={until.strftime('%Y%m%dT%H%M%S')}"
+
+    if not re.search(r"\bFREQ=", rule):
+        raise ValueError("FREQ is required")
+    # An INTERVAL below 1 never moves past the start date, so searching for
+    # the next occurrence would loop forever.
+    interval = re.search(r"\bINTERVAL=(-?\d+)", rule)
+    if interval and int(interval.group(1)) < 1:
+        raise ValueError("INTERVAL must be at least 1")
+
+    try:
+        return rrulestr(re.sub(UNTIL_UTC_PATTERN, to_local, rule), dtstart=start)
+    except TypeError as e:
+        raise ValueError(str(e)) from e
+
+
+# Recurrence rule anchored at the todo's current due date. Only the rule and
+# the next occurrence are stored; everything else is generated on demand.
+def todo_rule(rule, due_date):
+    return build_rule(rule, parser.parse(due_date))
+
+
+# First occurrence of a new recurring todo, at or after its parsed due date.
+# A series never starts before midnight today, the fuzzy date parse happily
+# reads "Read 5 pages daily" as the 5th of the month.
+def first_occurrence(rule, due_date=None):
+    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    start = max(parser.parse(due_date), today) if due_date else today
+    first = build_rule(rule, start).after(start, inc=True)
+    return first.strftime("%Y-%m-%d %H:%M:%S") if first else None
+
+
+# Advance a recurring todo by one occurrence, returns (due_date, rule) or None
+def next_occurrence(rule, due_date):
+    following = todo_rule(rule, due_date).after(parser.parse(due_date))
+    if following is None:
+        return None
+
+    # The rule is re-anchored at the new due date, so a COUNT has to shrink
+    # by the occurrence just completed.
+    count = re.search(r"COUNT=(\d+)", rule)
+    if count:
+        rule = rule.replace(count.group(0), f"COUNT={int(count.group(1)) - 1}")
+    return following.strftime("%Y-%m-%d %H:%M:%S"), rule
+
+
+# Lazily generate the next occurrences of a recurring todo
+def upcoming_occurrences(rule, due_date, limit=5):
+    return [
+        occurrence.strftime("%Y-%m-%d %H:%M:%S")
+        for occurrence in islice(todo_rule(rule, due_date), limit)
+    ]
+
+
+# Short recurrence summary for the todos table: the rule and the occurrence
+# after the current due date
+def describe_recurrence(rule, due_date):
+    if not rule:
+        return ""
+    try:
+        occurrences = upcoming_occurrences(rule, due_date, limit=2)
+    except ValueError:
+        return f"{rule}\n(invalid rule)"
+    if len(occurrences) < 2:
+        return f"{rule}\n(last occurrence)"
+    return f"{rule}\nthen {occurrences[1]}"
+
+
 # Create todo
-def create_todo(todo_id, description, due_date=None):
+def create_todo(todo_id, description, due_date=None, rule=None):
     todos_file = TODOS_DIR / "todos.txt"
     TODOS_DIR.mkdir(parents=True, exist_ok=True)
 
     with todos_file.open("a") as f:
         f.write(
-            f"{todo_id}|{description}|incomplete|{time.strftime('%Y-%m-%d %H:%M:%S')}|{due_date or ''}\n"
+            format_todo(
+                todo_id,
+                description,
+                "incomplete",
+                time.strftime("%Y-%m-%d %H:%M:%S"),
+                due_date,
+                rule,
+            )
         )
 
     print(f"Todo created: {todo_id}")
@@ -173,8 +318,20 @@ def create_todo(todo_id, description, due_date=None):
 # Add todo
 def add_todo(todo_description):
     todo_id = f"todo_{int(time.time())}"
+    rule, todo_description = extract_recurrence(todo_description)
     due_date = extract_due_date(todo_description)
-    create_todo(todo_id, todo_description, due_date)
+    if rule:
+        try:
+            due_date = first_occurrence(rule, due_date)
+        except ValueError as e:
+            console.print(f"Invalid recurrence rule '{rule}': {e}", style="bold red")
+            return
+        if not due_date:
+            console.print(
+                f"Recurrence rule '{rule}' has no occurrences.", style="bold red"
+            )
+            return
+    create_todo(todo_id, todo_description, due_date, rule)
 
 
 def get_todos_table():
@@ -183,8 +340,9 @@ def get_todos_table():
     table.add_column("Status", style="green", width=10)
     table.add_column("Due Date", style="yellow", width=25)
     table.add_column("Created", style="dim", width=20)
+    table.add_column("Repeats", style="cyan", width=30)
 
-    for i, (todo_id, description, status, created, due_date) in enumerate(todos):
+    for i, (todo_id, description, status, created, due_date, rule) in enumerate(todos):
         row_style = "reverse" if i == selected_row else ""
         status_marker = "[X]" if status == "complete" else "[ ]"
         table.add_row(
@@ -192,6 +350,7 @@ def get_todos_table():
             status_marker,
             due_date,
             created,
+            describe_recurrence(rule, due_date),
             style=row_style,
         )
     return table
@@ -225,7 +384,12 @@ def edit_todo(todo_id):
                 if new_status:
                     parts[2] = new_status
 
-                new_due_date = extract_due_date(parts[1])
+                # The stored due date of a recurring todo is its next
+                # occurrence, re-reading it from the description would
+                # rewind the series.
+                new_due_date = (
+                    None if len(parts) > 5 and parts[5] else extract_due_date(parts[1])
+                )
                 if new_due_date:
                     parts[4] = new_due_date
 
@@ -254,8 +418,7 @@ def list_todos():
 
     with todos_file.open("r") as f:
         for line in f:
-            todo_id, description, status, created, due_date = line.strip().split("|")
-            todos.append((todo_id, description, status, created, due_date))
+            todos.append(parse_todo(line))
     while True:
         clear_screen()
         console.print(get_todos_table())
@@ -332,19 +495,29 @@ def view_todo_detail(todo_id):
 
     with todos_file.open("r") as f:
         for line in f:
-            tid, description, status, created, due_date = line.strip().split("|")
+            tid, description, status, created, due_date, rule = parse_todo(line)
             if tid == todo_id:
                 console.print(f"[bold]ID:[/bold] {tid}")
                 console.print(f"[bold]Description:[/bold] {description}")
                 console.print(f"[bold]Status:[/bold] {status}")
                 console.print(f"[bold]Created:[/bold] {created}")
                 console.print(f"[bold]Due Date:[/bold] {due_date}")
+                if rule:
+                    console.print(f"[bold]Repeats:[/bold] {rule}")
+                    try:
+                        occurrences = upcoming_occurrences(rule, due_date)
+                    except ValueError as e:
+                        console.print(f"Invalid recurrence rule: {e}", style="bold red")
+                        return
+                    console.print("[bold]Upcoming:[/bold]")
+                    for occurrence in occurrences:
+                        console.print(f"  {occurrence}")
                 return
     console.print(f"Todo '{todo_id}' not found.", style="bold red")
 
 
-# Complete todo
-def complete_todo(todo_id):
+# Complete todo, end_series finishes a recurring todo for good
+def complete_todo(todo_id, end_series=False):
     todos_file = TODOS_DIR / "todos.txt"
     if not todos_file.exists():
         print("No todos found.")
@@ -355,7 +528,29 @@ def complete_todo(todo_id):
     updated = False
     for i, todo in enumerate(todos):
         if todo.startswith(todo_id):
-            if "|incomplete|" in todos[i]:
+            tid, description, status, created, due_date, rule = parse_todo(todo)
+            if end_series and rule:
+                todos[i] = format_todo(tid, description, "complete", created, due_date)
+                updated = True
+                break
+            # Recurring todos move on to their next occurrence instead of
+            # being completed, until the rule runs out.
+            try:
+                advanced = (
+                    next_occurrence(rule, due_date)
+                    if rule and due_date and status == "incomplete"
+                    else None
+                )
+            except ValueError as e:
+                console.print(
+                    f"Invalid recurrence rule '{rule}': {e}", style="bold red"
+                )
+                return
+            if advanced:
+                todos[i] = format_todo(tid, description, status, created, *advanced)
+                updated = True
+                break
+            elif "|incomplete|" in todos[i]:
                 todos[i] = todo.replace("|incomplete|", "|complete|", 1)
                 updated = True
                 break
@@ -567,8 +762,11 @@ def show_help():
         ('notes "Title" Content', "Create a new note with quoted title"),
         ("notes", "List all notes"),
         ("todo <description>", "Add a new todo"),
+        ("todo <description> daily", "Add a recurring todo (also 'every monday')"),
+        ("todo <description> rrule:<rule>", "Add a todo with an RRULE recurrence"),
         ("todos", "List all todos"),
         ("complete <id>", "Mark a todo as complete"),
+        ("complete <id> --end", "Complete a recurring todo and end the series"),
         ("help", "Show this help message"),
         ("exit", "Exit NerdNotes"),
     ]
@@ -613,7 +811,7 @@ def interactive_mode():
             todo_description = " ".join(parts[1:])
             add_todo(todo_description)
         elif command == "complete" and len(parts) > 1:
-            complete_todo(parts[1])
+            complete_todo(parts[1], end_series="--end" in parts[2:])
         elif command == "help":
             show_help()
         else:
@@ -640,6 +838,11 @@ def main():
     parser.add_argument(
         "params", nargs="*", help="Additional parameters for the action"
     )
+    parser.add_argument(
+        "--end",
+        action="store_true",
+        help="With complete-todo, end a recurring todo's series",
+    )
 
     args = parser.parse_args()
 
@@ -652,7 +855,7 @@ def main():
     elif args.action == "add-todo":
         add_todo(" ".join(args.params))
     elif args.action == "complete-todo":
-        complete_todo(args.params[0])
+        complete_todo(args.params[0], end_series=args.end)
 
 
 if __name__ == "__main__":
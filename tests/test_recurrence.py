@@ -0,0 +1,156 @@
+import time
+from datetime import datetime
+
+import pytest
+
+import ndnotes
+
+
+@pytest.fixture
+def todos_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(ndnotes, "TODOS_DIR", tmp_path)
+    return tmp_path / "todos.txt"
+
+
+@pytest.fixture
+def new_york(monkeypatch):
+    monkeypatch.setenv("TZ", "America/New_York")
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+
+def test_next_occurrence_counts_down_to_end_of_series():
+    rule, due_date = "FREQ=DAILY;COUNT=3", "2026-10-19 09:00:00"
+
+    due_date, rule = ndnotes.next_occurrence(rule, due_date)
+    assert (due_date, rule) == ("2026-10-20 09:00:00", "FREQ=DAILY;COUNT=2")
+
+    due_date, rule = ndnotes.next_occurrence(rule, due_date)
+    assert (due_date, rule) == ("2026-10-21 09:00:00", "FREQ=DAILY;COUNT=1")
+
+    assert ndnotes.next_occurrence(rule, due_date) is None
+
+
+def test_next_occurrence_open_ended_rule_keeps_going():
+    rule, due_date = "FREQ=WEEKLY", "2026-10-19 09:00:00"
+    for expected in ["2026-10-26 09:00:00", "2026-11-02 09:00:00"]:
+        due_date, rule = ndnotes.next_occurrence(rule, due_date)
+        assert (due_date, rule) == (expected, "FREQ=WEEKLY")
+
+
+def test_byday_rule_starts_at_first_matching_weekday():
+    # 2030-01-02 is a Wednesday, 2030-01-07 the following Monday
+    rule = "FREQ=WEEKLY;BYDAY=MO;COUNT=2"
+    due_date = ndnotes.first_occurrence(rule, "2030-01-02 09:00:00")
+    assert due_date == "2030-01-07 09:00:00"
+
+    due_date, rule = ndnotes.next_occurrence(rule, due_date)
+    assert (due_date, rule) == ("2030-01-14 09:00:00", "FREQ=WEEKLY;BYDAY=MO;COUNT=1")
+    assert ndnotes.next_occurrence(rule, due_date) is None
+
+
+def test_first_occurrence_without_date_starts_at_midnight():
+    due_date = ndnotes.first_occurrence("FREQ=DAILY")
+    assert due_date == datetime.now().strftime("%Y-%m-%d 00:00:00")
+
+
+def test_utc_until_is_converted_to_local_time(new_york):
+    # 2030-01-01 00:00 UTC is 2029-12-31 19:00 in New York
+    occurrences = ndnotes.upcoming_occurrences(
+        "FREQ=DAILY;UNTIL=20300101T000000Z", "2029-12-29 20:00:00", limit=10
+    )
+    assert occurrences[-1] == "2029-12-30 20:00:00"
+
+
+def test_fuzzy_past_date_does_not_start_series_in_the_past():
+    due_date = ndnotes.first_occurrence("FREQ=DAILY", "2020-01-05 00:00:00")
+    assert due_date == datetime.now().strftime("%Y-%m-%d 00:00:00")
+
+
+@pytest.mark.parametrize(
+    "rule", ["FREQ=DAILY;INTERVAL=0", "FREQ=DAILY;INTERVAL=-1", "COUNT=3"]
+)
+def test_invalid_rules_raise_value_error(rule):
+    with pytest.raises(ValueError):
+        ndnotes.first_occurrence(rule)
+    with pytest.raises(ValueError):
+        ndnotes.next_occurrence(rule, "2026-10-19 09:00:00")
+
+
+def test_recurrence_keywords_only_count_at_the_end():
+    assert ndnotes.extract_recurrence("Write weekly report") == (
+        None,
+        "Write weekly report",
+    )
+    assert ndnotes.extract_recurrence("Write report weekly") == (
+        "FREQ=WEEKLY",
+        "Write report",
+    )
+    assert ndnotes.extract_recurrence("Gym every Monday") == (
+        "FREQ=WEEKLY;BYDAY=MO",
+        "Gym",
+    )
+    assert ndnotes.extract_recurrence("Water plants rrule:FREQ=DAILY;COUNT=3 now") == (
+        "FREQ=DAILY;COUNT=3",
+        "Water plants now",
+    )
+
+
+def test_parse_and_format_todo_lines():
+    assert ndnotes.parse_todo("a|Plain|incomplete|c|\n") == (
+        "a",
+        "Plain",
+        "incomplete",
+        "c",
+        "",
+        "",
+    )
+    assert ndnotes.format_todo("a", "Plain", "incomplete", "c", None) == (
+        "a|Plain|incomplete|c|\n"
+    )
+    assert ndnotes.format_todo("a", "Gym", "incomplete", "c", "d", "FREQ=DAILY") == (
+        "a|Gym|incomplete|c|d|FREQ=DAILY\n"
+    )
+
+
+def test_complete_todo_advances_series_until_it_runs_out(todos_file):
+    todos_file.write_text(
+        "todo_1|Gym|incomplete|c|2026-10-19 09:00:00|FREQ=WEEKLY;COUNT=2\n"
+        "todo_2|Plain|incomplete|c|\n"
+    )
+
+    ndnotes.complete_todo("todo_1")
+    assert todos_file.read_text() == (
+        "todo_1|Gym|incomplete|c|2026-10-26 09:00:00|FREQ=WEEKLY;COUNT=1\n"
+        "todo_2|Plain|incomplete|c|\n"
+    )
+
+    ndnotes.complete_todo("todo_1")
+    assert todos_file.read_text() == (
+        "todo_1|Gym|complete|c|2026-10-26 09:00:00|FREQ=WEEKLY;COUNT=1\n"
+        "todo_2|Plain|incomplete|c|\n"
+    )
+
+
+def test_complete_todo_end_series_drops_rule(todos_file):
+    todos_file.write_text("todo_1|Gym|incomplete|c|2026-10-19 09:00:00|FREQ=WEEKLY\n")
+    ndnotes.complete_todo("todo_1", end_series=True)
+    assert todos_file.read_text() == "todo_1|Gym|complete|c|2026-10-19 09:00:00\n"
+
+
+@pytest.mark.parametrize(
+    "description", ["X rrule:FREQ=DAILY;INTERVAL=0", "X rrule:COUNT=3"]
+)
+def test_add_todo_rejects_invalid_rules(todos_file, description):
+    ndnotes.add_todo(description)
+    assert not todos_file.exists()
+
+
+def test_add_todo_writes_recurring_line(todos_file):
+    ndnotes.add_todo("Read 5 pages daily")
+    (line,) = todos_file.read_text().splitlines()
+    _, description, status, _, due_date, rule = ndnotes.parse_todo(line)
+    assert (description, status, rule) == ("Read 5 pages", "incomplete", "FREQ=DAILY")
+    assert due_date == datetime.now().strftime("%Y-%m-%d 00:00:00")